@@ -30,10 +30,10 @@ Features:
 Dependencies:
     - requests: HTTP client for API calls
     - pandas: Data manipulation and analysis
-    - jdatetime: Jalali/Gregorian date conversion
     - sqlalchemy: Database ORM and connection management
     - pyodbc: SQL Server ODBC driver
     - tenacity: Retry logic for robustness
+    - orjson: Faster JSON decoding (optional)
     
 Configuration:
     Create a .env file from .env.example:
@@ -56,17 +56,18 @@ Usage:
 
 import os
 import sys
+import json
 import logging
-from typing import Optional, Dict, List, Any
+from typing import Optional, Dict, List, Any, Tuple, NamedTuple
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
-import re
 
 import requests
+from requests.adapters import HTTPAdapter
 import numpy as np
 import pandas as pd
-import jdatetime
-from sqlalchemy import create_engine, CHAR, NVARCHAR, BigInteger, DATETIME
+from sqlalchemy import create_engine, inspect, text, CHAR, NVARCHAR, BigInteger, DATETIME
 from sqlalchemy.exc import SQLAlchemyError
 from tenacity import (
     retry,
@@ -75,6 +76,13 @@ from tenacity import (
     retry_if_exception_type
 )
 
+# Faster JSON decoding for paginated API responses (optional)
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
 # Import secure config module
 from config import get_connection_string, get_table_name, get_api_config, load_env_file
 
@@ -118,6 +126,109 @@ def setup_logging(log_level: int = logging.INFO) -> logging.Logger:
 logger = setup_logging()
 
 
+# Persian and Arabic-Indic digits map to ASCII
+_PERSIAN_DIGIT_TRANS = str.maketrans('۰۱۲۳۴۵۶۷۸۹٠١٢٣٤٥٦٧٨٩', '01234567890123456789')
+
+# Same mapping, additionally dropping separators found in dates and prices
+_DIGIT_TRANS = {**_PERSIAN_DIGIT_TRANS, **str.maketrans('', '', ',.:/\\- ')}
+
+# Every byte except ASCII 0-9, for deleting non-digits with bytes.translate
+_NON_DIGIT_BYTES = bytes(b for b in range(256) if not 0x30 <= b <= 0x39)
+
+
+# Positions in the 33-year cycle whose Esfand has 30 days (jdatetime's rule)
+_JALALI_LEAP_REMAINDERS = (1, 5, 9, 13, 17, 22, 26, 30)
+
+
+def is_valid_jalali(jy: int, jm: int, jd: int) -> bool:
+    """
+    Check that a Jalali year/month/day triple names a real date.
+    
+    Args:
+        jy: Jalali year
+        jm: Jalali month (1-12)
+        jd: Jalali day of month
+    
+    Returns:
+        True if the date exists in the Jalali calendar
+    """
+    if jy < 1 or not 1 <= jm <= 12 or jd < 1:
+        return False
+    if jm <= 6:
+        return jd <= 31
+    if jm <= 11:
+        return jd <= 30
+    return jd <= (30 if jy % 33 in _JALALI_LEAP_REMAINDERS else 29)
+
+
+# Days elapsed before each Gregorian month in a non-leap year
+_GREGORIAN_MONTH_OFFSETS = (0, 31, 59, 90, 120, 151, 181, 212, 243, 273, 304, 334)
+
+
+def gregorian_to_jalali(gy: int, gm: int, gd: int) -> Tuple[int, int, int]:
+    """
+    Convert a Gregorian date to Jalali using pure integer arithmetic.
+    
+    Args:
+        gy: Gregorian year
+        gm: Gregorian month (1-12)
+        gd: Gregorian day of month
+    
+    Returns:
+        Tuple of (Jalali year, month, day)
+    """
+    gy2 = gy + 1 if gm > 2 else gy
+    days = (
+        355666 + 365 * gy + (gy2 + 3) // 4 - (gy2 + 99) // 100 + (gy2 + 399) // 400
+        + gd + _GREGORIAN_MONTH_OFFSETS[gm - 1]
+    )
+    jy = -1595 + 33 * (days // 12053)
+    days %= 12053
+    jy += 4 * (days // 1461)
+    days %= 1461
+    if days > 365:
+        jy += (days - 1) // 365
+        days = (days - 1) % 365
+    if days < 186:
+        return jy, 1 + days // 31, 1 + days % 31
+    return jy, 7 + (days - 186) // 30, 1 + (days - 186) % 30
+
+
+def gregorian_to_jalali_arrays(
+    gy: np.ndarray,
+    gm: np.ndarray,
+    gd: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Vectorized gregorian_to_jalali over integer NumPy arrays.
+    
+    Args:
+        gy: Gregorian years
+        gm: Gregorian months (1-12)
+        gd: Gregorian days of month
+    
+    Returns:
+        Tuple of (Jalali years, months, days) arrays
+    """
+    gy = gy.astype(np.int64)
+    gy2 = np.where(gm > 2, gy + 1, gy)
+    days = (
+        355666 + 365 * gy + (gy2 + 3) // 4 - (gy2 + 99) // 100 + (gy2 + 399) // 400
+        + gd + np.asarray(_GREGORIAN_MONTH_OFFSETS)[gm - 1]
+    )
+    jy = -1595 + 33 * (days // 12053)
+    days %= 12053
+    jy += 4 * (days // 1461)
+    days %= 1461
+    past_first_year = days > 365
+    jy += np.where(past_first_year, (days - 1) // 365, 0)
+    days = np.where(past_first_year, (days - 1) % 365, days)
+    first_half = days < 186
+    jm = np.where(first_half, 1 + days // 31, 7 + (days - 186) // 30)
+    jd = np.where(first_half, 1 + days % 31, 1 + (days - 186) % 30)
+    return jy, jm, jd
+
+
 class JDate:
     """
     Adapter class for handling Jalali (Persian) date conversions.
@@ -148,33 +259,83 @@ class JDate:
         if not self.value or self.value == 'null':
             return None
         
+        value = self.value
+        if isinstance(value, str):
+            # isdigit() also accepts Persian digits, so map them before slicing
+            value = value.translate(_PERSIAN_DIGIT_TRANS)
         try:
-            # 8-digit string format (YYYYMMDD)
-            if isinstance(self.value, str) and self.value.isdigit() and len(self.value) == 8:
-                jd = jdatetime.date(
-                    int(self.value[0:4]),
-                    int(self.value[4:6]),
-                    int(self.value[6:8])
-                )
-            # ISO date string format (YYYY-MM-DD)
-            elif isinstance(self.value, str) and '-' in self.value:
-                g = datetime.strptime(self.value, "%Y-%m-%d")
-                jd = jdatetime.date.fromgregorian(date=g)
-            # datetime object
-            elif isinstance(self.value, datetime):
-                jd = jdatetime.date.fromgregorian(date=self.value)
+            # 8-digit string format (YYYYMMDD) is already Jalali - just slice it
+            if isinstance(value, str) and value.isdigit() and len(value) == 8:
+                year, month, day = value[:4], value[4:6], value[6:8]
+                if not is_valid_jalali(int(year), int(month), int(day)):
+                    raise ValueError(f"{value} is not a valid Jalali date")
             else:
-                logger.warning(f"Unsupported date format: {self.value}")
-                return None
+                # ISO date string format (YYYY-MM-DD)
+                if isinstance(value, str) and '-' in value:
+                    value = datetime.strptime(value, "%Y-%m-%d")
+                # datetime object
+                elif not isinstance(value, datetime):
+                    logger.warning(f"Unsupported date format: {self.value}")
+                    return None
+                
+                jy, jm, jd = gregorian_to_jalali(value.year, value.month, value.day)
+                year, month, day = f"{jy:04d}", f"{jm:02d}", f"{jd:02d}"
             
-            return jd.strftime(
-                fmt.replace('Y', '%Y')
-                   .replace('m', '%m')
-                   .replace('d', '%d')
-            )
+            return fmt.replace('Y', year).replace('m', month).replace('d', day)
         except (ValueError, TypeError) as e:
             logger.error(f"Date formatting error for '{self.value}': {e}")
             return None
+    
+    @staticmethod
+    def format_batch(values: pd.Series) -> pd.Series:
+        """
+        Format a whole column as Jalali 'YYYY-MM-DD' strings.
+        
+        Vectorized equivalent of JDate(value).format('Y-m-d'). Compact 8-digit
+        Jalali values (Persian or ASCII digits) are translated and sliced;
+        ISO Gregorian strings and datetimes are converted with
+        gregorian_to_jalali_arrays.
+        
+        Args:
+            values: Raw date values
+        
+        Returns:
+            Series of formatted Jalali date strings (missing where invalid)
+        """
+        # Translate before matching: with pyarrow string storage \d is ASCII-only
+        text = values.astype('string').str.translate(_PERSIAN_DIGIT_TRANS)
+        compact = text.str.fullmatch(r'[0-9]{8}').fillna(False).astype(bool)
+        digits = text[compact]
+        
+        # Same range check as is_valid_jalali, over whole columns
+        jy = digits.str[:4].astype(int).to_numpy()
+        jm = digits.str[4:6].astype(int).to_numpy()
+        jd = digits.str[6:8].astype(int).to_numpy()
+        month_days = np.where(
+            jm <= 6, 31,
+            np.where(jm <= 11, 30, np.where(np.isin(jy % 33, _JALALI_LEAP_REMAINDERS), 30, 29))
+        )
+        digits = digits[(jy >= 1) & (jm >= 1) & (jm <= 12) & (jd >= 1) & (jd <= month_days)]
+        
+        formatted = pd.Series(None, index=values.index, dtype=object)
+        formatted[digits.index] = digits.str[:4] + '-' + digits.str[4:6] + '-' + digits.str[6:8]
+        
+        if compact.all():
+            return formatted
+        
+        gregorian = pd.to_datetime(values[~compact], format='%Y-%m-%d', errors='coerce')
+        gregorian = gregorian[gregorian.notna()]
+        if not gregorian.empty:
+            jy, jm, jd = gregorian_to_jalali_arrays(
+                gregorian.dt.year.to_numpy(),
+                gregorian.dt.month.to_numpy(),
+                gregorian.dt.day.to_numpy()
+            )
+            parts = pd.DataFrame({'y': jy, 'm': jm, 'd': jd}, index=gregorian.index).astype(str)
+            formatted[gregorian.index] = (
+                parts['y'].str.zfill(4) + '-' + parts['m'].str.zfill(2) + '-' + parts['d'].str.zfill(2)
+            )
+        return formatted
 
 
 class Config:
@@ -188,6 +349,18 @@ class Config:
     API_TIMEOUT = _api_config['timeout']
     MAX_RETRIES = _api_config['max_retries']
     
+    # Endpoints are fetched concurrently, and full-history endpoints also fetch
+    # their pages concurrently; the pool is sized to cover both levels
+    MAX_WORKERS = _api_config['max_workers']
+    PAGE_WORKERS = 4
+    POOL_SIZE = MAX_WORKERS * PAGE_WORKERS
+    
+    # HTTP validators (ETag/Last-Modified) of each endpoint's first page
+    HTTP_CACHE_FILE = Path("cache") / "http_validators.json"
+    
+    # Rows per executemany batch when bulk-loading with fast_executemany
+    INSERT_CHUNK_SIZE = 10000
+    
     # Bill = physical banknotes, WireTransfer = electronic transfer
     CURRENCY_TYPES = {
         14: 'Bill', 15: 'WireTransfer',      # USD
@@ -205,6 +378,30 @@ class Config:
         'WireTransfer': 'حواله'
     }
     
+    # Composite key identifying a record in the target table
+    KEY_COLUMNS = ['Date', 'Symbol', 'EnglishCurrencyType', 'EnglishAssetType']
+    
+    # Low-cardinality label columns held as categoricals in memory
+    CATEGORY_COLUMNS = [
+        'Symbol', 'EnglishCurrencyType', 'PersianCurrencyType',
+        'EnglishAssetType', 'PersianAssetType'
+    ]
+    
+    COLUMN_TYPES = {
+        'Date': CHAR(10),
+        'Name': NVARCHAR(100),
+        'SellPrice': BigInteger(),
+        'BuyPrice': BigInteger(),
+        'ScrapeDate': CHAR(10),
+        'Scrapetime': CHAR(8),
+        'Symbol': CHAR(3),
+        'PersianCurrencyType': NVARCHAR(50),
+        'EnglishCurrencyType': NVARCHAR(50),
+        'PersianAssetType': NVARCHAR(50),
+        'EnglishAssetType': NVARCHAR(50),
+        'ScrapeDateTime': DATETIME()
+    }
+    
     CURRENCY_META = {
         14: {'symbol': 'USD', 'name': 'دلار آمریکا'},
         15: {'symbol': 'USD', 'name': 'دلار آمریکا'},
@@ -225,6 +422,26 @@ class Config:
     }
 
 
+class CurrencyInfo(NamedTuple):
+    """Resolved metadata for a single currency endpoint."""
+    symbol: str
+    name: str
+    ctype: str
+    ctype_fa: str
+
+
+# One lookup per currency instead of three separate dict lookups
+CURRENCY_INFO: Dict[int, CurrencyInfo] = {
+    currency_id: CurrencyInfo(
+        symbol=meta['symbol'],
+        name=meta['name'],
+        ctype=Config.CURRENCY_TYPES[currency_id],
+        ctype_fa=Config.CURRENCY_TYPE_FA[Config.CURRENCY_TYPES[currency_id]]
+    )
+    for currency_id, meta in Config.CURRENCY_META.items()
+}
+
+
 class CurrencyETL:
     """Main ETL pipeline for currency data extraction and loading."""
     
@@ -253,11 +470,18 @@ class CurrencyETL:
             # Get table name from parameter, environment, or default
             self.table_name = table_name or get_table_name(prefix='DB', default='IceAssets')
             
-            # Initialize HTTP session
-            self.session = requests.Session()
-            self.session.headers.update({
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-            })
+            # One pooled engine shared by all database steps of a run
+            self.engine = create_engine(
+                self.connection_string,
+                pool_pre_ping=True,
+                pool_size=4
+            )
+            
+            # Initialize HTTP session and conditional-GET validators
+            self.session = self._create_session()
+            self.validators = self._load_validators()
+            self._fresh_validators: Dict[str, Dict[str, str]] = {}
+            self.failed_endpoints: List[int] = []
             
             logger.info(f"CurrencyETL initialized - Table: {self.table_name}")
             logger.info("Configuration validated successfully")
@@ -268,34 +492,72 @@ class CurrencyETL:
             raise
     
     @staticmethod
-    def clean_persian_number(text: Any) -> Optional[str]:
-        """Convert Persian digits to English and remove non-numeric characters."""
-        if not text or pd.isna(text):
-            return None
+    def _create_session() -> requests.Session:
+        """
+        Create an HTTP session with a connection pool shared across worker threads.
         
+        Returns:
+            Configured requests.Session that reuses TCP/TLS connections
+        """
+        session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=Config.POOL_SIZE,
+            pool_maxsize=Config.POOL_SIZE,
+            max_retries=0  # retries are handled by tenacity on fetch_currency_history
+        )
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        session.headers.update({
+            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+        })
+        return session
+    
+    @staticmethod
+    def _load_validators() -> Dict[str, Dict[str, str]]:
+        """Load HTTP validators persisted by the last successful run."""
         try:
-            text = str(text)
-            trans = str.maketrans('۰۱۲۳۴۵۶۷۸۹', '0123456789')
-            text = text.translate(trans)
-            cleaned = re.sub(r'[^\d]', '', text)
-            return cleaned if cleaned else None
-        except Exception as e:
-            logger.warning(f"Failed to clean number '{text}': {e}")
-            return None
+            with open(Config.HTTP_CACHE_FILE, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable HTTP cache {Config.HTTP_CACHE_FILE}: {e}")
+            return {}
+    
+    def _save_validators(self) -> None:
+        """Persist validators seen in this run so unchanged endpoints can be skipped."""
+        if not self._fresh_validators and not self.failed_endpoints:
+            return
+        
+        # Failed endpoints must be fully refetched next run, never answered by a 304
+        failed_urls = {
+            meta['url'] for meta in self.build_currency_urls()
+            if meta['currency_id'] in self.failed_endpoints
+        }
+        validators = {
+            url: cached
+            for url, cached in {**self.validators, **self._fresh_validators}.items()
+            if url not in failed_urls
+        }
+        
+        try:
+            Config.HTTP_CACHE_FILE.parent.mkdir(exist_ok=True)
+            with open(Config.HTTP_CACHE_FILE, 'w', encoding='utf-8') as f:
+                json.dump(validators, f, indent=2)
+        except OSError as e:
+            logger.warning(f"Failed to write HTTP cache {Config.HTTP_CACHE_FILE}: {e}")
     
     @staticmethod
-    def correct_date_format(jalali_date: Any) -> Optional[str]:
-        """Convert YYYYMMDD format to YYYY-MM-DD format."""
-        if not jalali_date:
+    def clean_persian_number(text: Any) -> Optional[str]:
+        """Convert Persian digits to English and remove non-numeric characters."""
+        if not text or pd.isna(text):
             return None
         
         try:
-            jalali_date = str(jalali_date)
-            if len(jalali_date) == 8:
-                return f"{jalali_date[:4]}-{jalali_date[4:6]}-{jalali_date[6:8]}"
-            return jalali_date
+            ascii_text = str(text).translate(_PERSIAN_DIGIT_TRANS).encode('ascii', 'ignore')
+            return ascii_text.translate(None, _NON_DIGIT_BYTES).decode('ascii') or None
         except Exception as e:
-            logger.warning(f"Failed to format date '{jalali_date}': {e}")
+            logger.warning(f"Failed to clean number '{text}': {e}")
             return None
     
     def build_currency_urls(self) -> List[Dict[str, Any]]:
@@ -311,17 +573,32 @@ class CurrencyETL:
         return urls
     
     @retry(
-        stop=stop_after_attempt(3),
+        stop=stop_after_attempt(max(1, Config.MAX_RETRIES)),
         wait=wait_exponential(multiplier=1, min=2, max=10),
         retry=retry_if_exception_type((requests.RequestException, requests.Timeout)),
         reraise=True
     )
-    def fetch_currency_history(self, url: str) -> List[Dict]:
+    def fetch_currency_history(
+        self,
+        url: str,
+        session: Optional[requests.Session] = None,
+        stop_before_date: Optional[str] = None,
+        validators: Optional[Dict[str, Dict[str, str]]] = None
+    ) -> List[Dict]:
         """
-        Fetch complete currency history from ICE.ir API with automatic pagination.
+        Fetch currency history from ICE.ir API with automatic pagination.
+        
+        The API returns records newest first, so when a watermark is given
+        pagination is serial and stops at the first page that reaches older
+        records. Without one, the remaining pages are fetched in parallel once
+        the first page reports the total count.
         
         Args:
             url: Base API endpoint URL
+            session: HTTP session to use (defaults to the pipeline's pooled session)
+            stop_before_date: Compact 'YYYYMMDD' Jalali date; older records are skipped
+            validators: Pending mapping that receives the first page's ETag/Last-Modified;
+                the caller commits it only once the whole endpoint has succeeded
         
         Returns:
             List of all currency history records
@@ -329,86 +606,221 @@ class CurrencyETL:
         Raises:
             requests.RequestException: If API request fails after retries
         """
-        all_results = []
-        offset = 0
-        
+        session = session or self.session
         logger.debug(f"Starting to fetch data from: {url}")
         
-        while True:
-            params = {
-                'lang': 'fa',
-                'limit': Config.PAGE_SIZE,
-                'offset': offset
-            }
-            
-            try:
-                response = self.session.get(url, params=params, timeout=Config.API_TIMEOUT)
-                response.raise_for_status()
-                
-                data = response.json()
-                results = data.get('results', [])
-                count = data.get('count', 0)
-                
-                if not results:
+        # A retried attempt must not keep validators from a failed one
+        if validators is not None:
+            validators.clear()
+        
+        # Records are newest first, so an unchanged first page means nothing new
+        first_page = self._fetch_page(session, url, 0, self._conditional_headers(url), validators)
+        if first_page is None:
+            logger.debug(f"Not modified since last run: {url}")
+            return []
+        
+        results = first_page.get('results', [])
+        count = first_page.get('count', 0)
+        
+        if not stop_before_date:
+            # Full history: the page count is known up front, so fetch the rest in parallel
+            all_results = list(results)
+            offsets = range(Config.PAGE_SIZE, count, Config.PAGE_SIZE) if results else range(0)
+            if offsets:
+                with ThreadPoolExecutor(max_workers=Config.PAGE_WORKERS) as executor:
+                    pages = executor.map(lambda o: self._fetch_page(session, url, o), offsets)
+                    for page in pages:
+                        all_results.extend((page or {}).get('results', []))
+        else:
+            # Incremental: paginate serially so it can stop at the watermark
+            all_results = []
+            offset = 0
+            while results:
+                fresh = [r for r in results if not self._is_before(r, stop_before_date)]
+                all_results.extend(fresh)
+                if len(fresh) < len(results):
+                    logger.debug(f"Reached stored watermark {stop_before_date} at offset={offset}")
                     break
                 
-                all_results.extend(results)
                 offset += Config.PAGE_SIZE
-                
-                logger.debug(f"Fetched {len(results)} records (offset={offset}, total={count})")
-                
                 if offset >= count:
                     break
-                    
-            except requests.Timeout:
-                logger.warning(f"Timeout fetching from {url}, retrying...")
-                raise
-            except requests.RequestException as e:
-                logger.error(f"Request error: {e}")
-                raise
+                
+                page = self._fetch_page(session, url, offset) or {}
+                results = page.get('results', [])
+                count = page.get('count', count)
         
         logger.info(f"Completed fetching {len(all_results)} total records")
         return all_results
     
-    def parse_item(self, item: Dict, now: datetime, currency_id: int) -> Optional[Dict]:
+    def _fetch_page(
+        self,
+        session: requests.Session,
+        url: str,
+        offset: int,
+        headers: Optional[Dict[str, str]] = None,
+        validators: Optional[Dict[str, Dict[str, str]]] = None
+    ) -> Optional[Dict]:
         """
-        Parse a single API response item into standardized database record format.
+        Fetch and decode a single page of an endpoint.
         
         Args:
-            item: Raw API response item
-            now: Current timestamp for scrape tracking
-            currency_id: Currency identifier
+            session: HTTP session to use
+            url: Base API endpoint URL
+            offset: Pagination offset
+            headers: Extra request headers (e.g. conditional GET validators)
+            validators: Pending mapping that receives this response's validators
         
         Returns:
-            Standardized record dictionary or None if parsing fails
+            Decoded JSON payload, or None if the server answered 304 Not Modified
+        
+        Raises:
+            requests.RequestException: If the request fails
         """
+        params = {
+            'lang': 'fa',
+            'limit': Config.PAGE_SIZE,
+            'offset': offset
+        }
+        
         try:
-            meta = Config.CURRENCY_META.get(currency_id)
-            if not meta:
-                logger.warning(f"No metadata found for currency_id={currency_id}")
+            response = session.get(url, params=params, headers=headers, timeout=Config.API_TIMEOUT)
+            if response.status_code == 304:
                 return None
+            response.raise_for_status()
             
-            ctype = Config.CURRENCY_TYPES.get(currency_id)
-            sell = item.get('sell_price')
-            buy = item.get('buy_price')
+            if validators is not None:
+                self._remember_validators(url, response, validators)
             
-            return {
-                'Date': JDate(item.get('date')).format('Y-m-d'),
-                'Name': meta['name'],
-                'SellPrice': int(float(sell)) if sell and sell != 'null' else None,
-                'BuyPrice': int(float(buy)) if buy and buy != 'null' else None,
-                'Symbol': meta['symbol'],
-                'PersianCurrencyType': Config.CURRENCY_TYPE_FA.get(ctype),
-                'EnglishCurrencyType': ctype,
-                'PersianAssetType': 'ارز',
-                'EnglishAssetType': 'Currency',
-                'ScrapeDate': now.strftime('%Y-%m-%d'),
-                'Scrapetime': now.strftime('%H:%M:%S'),
-                'ScrapeDateTime': now.strftime('%Y-%m-%d %H:%M:%S')
-            }
-        except Exception as e:
-            logger.error(f"Failed to parse item {item}: {e}")
-            return None
+            data = orjson.loads(response.content) if ORJSON_AVAILABLE else response.json()
+            logger.debug(
+                f"Fetched {len(data.get('results', []))} records "
+                f"(offset={offset}, total={data.get('count', 0)})"
+            )
+            return data
+            
+        except requests.Timeout:
+            logger.warning(f"Timeout fetching from {url}, retrying...")
+            raise
+        except requests.RequestException as e:
+            logger.error(f"Request error: {e}")
+            raise
+    
+    def _conditional_headers(self, url: str) -> Dict[str, str]:
+        """Build If-None-Match/If-Modified-Since headers from stored validators."""
+        cached = self.validators.get(url, {})
+        headers = {}
+        if cached.get('etag'):
+            headers['If-None-Match'] = cached['etag']
+        if cached.get('last_modified'):
+            headers['If-Modified-Since'] = cached['last_modified']
+        return headers
+    
+    @staticmethod
+    def _remember_validators(
+        url: str,
+        response: requests.Response,
+        pending: Dict[str, Dict[str, str]]
+    ) -> None:
+        """Record the ETag/Last-Modified headers of an endpoint's first page."""
+        validators = {
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified')
+        }
+        if any(validators.values()):
+            pending[url] = validators
+    
+    @staticmethod
+    def _is_before(item: Dict, watermark: str) -> bool:
+        """Check whether an API item is dated strictly before a compact watermark."""
+        date = str(item.get('date') or '').translate(_DIGIT_TRANS)
+        return len(date) == 8 and date < watermark
+    
+    @staticmethod
+    def scrape_stamp(now: datetime) -> Dict[str, str]:
+        """
+        Format the scrape tracking columns for a batch timestamp.
+        
+        Args:
+            now: Current timestamp for scrape tracking
+        
+        Returns:
+            Dictionary with ScrapeDate, Scrapetime and ScrapeDateTime strings
+        """
+        scrape_datetime = now.strftime('%Y-%m-%d %H:%M:%S')
+        return {
+            'ScrapeDate': scrape_datetime[:10],
+            'Scrapetime': scrape_datetime[11:],
+            'ScrapeDateTime': scrape_datetime
+        }
+    
+    def build_currency_frame(
+        self,
+        items: List[Dict],
+        scrape_stamp: Dict[str, str],
+        currency_id: int
+    ) -> pd.DataFrame:
+        """
+        Build standardized database records for one endpoint in a single pass.
+        
+        Columns are converted whole; the per-currency metadata and scrape
+        stamp are broadcast as scalars.
+        
+        Args:
+            items: Raw API response items
+            scrape_stamp: Scrape tracking columns, as built by scrape_stamp()
+            currency_id: Currency identifier
+        
+        Returns:
+            DataFrame of standardized records (empty if metadata is missing)
+        """
+        info = CURRENCY_INFO.get(currency_id)
+        if not info:
+            logger.warning(f"No metadata found for currency_id={currency_id}")
+            return pd.DataFrame()
+        
+        raw = pd.DataFrame(items, columns=['date', 'sell_price', 'buy_price'])
+        
+        def to_price(values: pd.Series) -> pd.Series:
+            return np.trunc(pd.to_numeric(values, errors='coerce')).astype('Int64')
+        
+        return pd.DataFrame({
+            'Date': JDate.format_batch(raw['date']),
+            'Name': info.name,
+            'SellPrice': to_price(raw['sell_price']),
+            'BuyPrice': to_price(raw['buy_price']),
+            'Symbol': info.symbol,
+            'PersianCurrencyType': info.ctype_fa,
+            'EnglishCurrencyType': info.ctype,
+            'PersianAssetType': 'ارز',
+            'EnglishAssetType': 'Currency',
+            **scrape_stamp
+        })
+    
+    def _fetch_and_frame(
+        self,
+        meta: Dict[str, Any],
+        scrape_stamp: Dict[str, str],
+        stop_before_date: Optional[str] = None
+    ) -> Tuple[int, pd.DataFrame, Dict[str, Dict[str, str]]]:
+        """
+        Fetch one endpoint and convert it to a DataFrame.
+        
+        Args:
+            meta: Endpoint description from build_currency_urls
+            scrape_stamp: Scrape tracking columns shared by the whole run
+            stop_before_date: Optional watermark forwarded to fetch_currency_history
+            
+        Returns:
+            Tuple of (number of records retrieved, endpoint DataFrame,
+            pending validators to commit if the endpoint succeeded)
+        """
+        validators: Dict[str, Dict[str, str]] = {}
+        items = self.fetch_currency_history(meta['url'], self.session, stop_before_date, validators)
+        if not items:
+            return 0, pd.DataFrame(), validators
+        frame = self.build_currency_frame(items, scrape_stamp, meta['currency_id'])
+        return len(items), frame, validators
     
     def process_all_currency_data(self) -> pd.DataFrame:
         """
@@ -417,43 +829,68 @@ class CurrencyETL:
         Returns:
             DataFrame with processed currency data
         """
-        now = datetime.now()
-        all_data = []
+        scrape_stamp = self.scrape_stamp(datetime.now())
         urls = self.build_currency_urls()
         
         logger.info(f"Processing {len(urls)} currency endpoints...")
         
-        for idx, meta in enumerate(urls, 1):
-            currency_id = meta['currency_id']
-            ctype = meta['ctype']
-            
-            logger.info(f"[{idx}/{len(urls)}] Fetching currency_id={currency_id} ({ctype})")
+        watermarks = self.load_latest_dates()
+        self.failed_endpoints = []
+        self._fresh_validators = {}
+        
+        # Fan out the I/O-bound fetches; each worker turns its endpoint into a
+        # frame so the raw JSON never outlives the thread that fetched it
+        frames: Dict[int, pd.DataFrame] = {}
+        with ThreadPoolExecutor(max_workers=max(1, min(Config.MAX_WORKERS, len(urls)))) as executor:
+            futures = {
+                executor.submit(
+                    self._fetch_and_frame,
+                    meta,
+                    scrape_stamp,
+                    watermarks.get(self._currency_key(meta['currency_id']))
+                ): idx
+                for idx, meta in enumerate(urls, 1)
+            }
             
-            try:
-                items = self.fetch_currency_history(meta['url'])
-                logger.info(f"  ✓ Retrieved {len(items)} records")
+            for future in as_completed(futures):
+                idx = futures[future]
+                currency_id = urls[idx - 1]['currency_id']
+                ctype = urls[idx - 1]['ctype']
                 
-                for item in items:
-                    parsed = self.parse_item(item, now, currency_id)
-                    if parsed:
-                        all_data.append(parsed)
-                        
-            except Exception as e:
-                logger.error(f"  ✗ Failed to fetch currency_id={currency_id}: {e}")
-                continue
-        
-        if not all_data:
+                try:
+                    count, frame, validators = future.result()
+                    logger.info(
+                        f"[{idx}/{len(urls)}] ✓ Retrieved {count} records "
+                        f"for currency_id={currency_id} ({ctype})"
+                    )
+                except Exception as e:
+                    self.failed_endpoints.append(currency_id)
+                    logger.error(
+                        f"[{idx}/{len(urls)}] ✗ Failed to fetch currency_id={currency_id}: {e}"
+                    )
+                    continue
+                
+                # Validators are committed only for endpoints that fully succeeded
+                self._fresh_validators.update(validators)
+                if not frame.empty:
+                    frames[idx] = frame
+        
+        if not frames:
             logger.warning("No data collected from API")
             return pd.DataFrame()
         
-        df = pd.DataFrame(all_data)
+        # Concatenate in endpoint order so output is deterministic
+        df = pd.concat([frames[idx] for idx in sorted(frames)], ignore_index=True)
         logger.info(f"Created DataFrame with {len(df)} rows")
         
-        # Clean dates
-        df['Date'] = df['Date'].apply(self.clean_persian_number).apply(self.correct_date_format)
+        # Replace various null representations; numeric columns already use pd.NA
+        text_cols = df.select_dtypes(include=['object', 'string']).columns
+        text_values = df[text_cols]
+        df[text_cols] = text_values.mask(text_values.isna() | text_values.isin(['', 'nan--']), None)
         
-        # Replace various null representations
-        df = df.replace([np.nan, "", "nan--"], None)
+        # A handful of distinct labels repeated on every row; astype(object)
+        # in save_to_database turns them back into plain strings for pyodbc
+        df[Config.CATEGORY_COLUMNS] = df[Config.CATEGORY_COLUMNS].astype('category')
         
         # Validate data
         null_dates = df['Date'].isna().sum()
@@ -462,63 +899,69 @@ class CurrencyETL:
         
         return df
     
-    def load_existing_keys(self) -> pd.DataFrame:
+    @staticmethod
+    def _currency_key(currency_id: int) -> Tuple[Optional[str], Optional[str]]:
+        """Return the (Symbol, EnglishCurrencyType) pair for a currency identifier."""
+        info = CURRENCY_INFO.get(currency_id)
+        return (info.symbol, info.ctype) if info else (None, None)
+    
+    def load_latest_dates(self) -> Dict[Tuple[str, str], str]:
         """
-        Load existing record keys from database for deduplication.
+        Load the most recent stored date per currency to bound API pagination.
         
         Returns:
-            DataFrame with existing keys
+            Mapping of (Symbol, EnglishCurrencyType) to a compact 'YYYYMMDD' date;
+            empty if the table is missing or unreachable (full history is fetched)
         """
         try:
-            engine = create_engine(self.connection_string)
             query = f"""
-                SELECT [Date], [Symbol], [EnglishCurrencyType]
+                SELECT [Symbol], [EnglishCurrencyType], MAX([Date]) AS [LatestDate]
                 FROM {self.table_name}
                 WHERE [EnglishAssetType] = 'Currency'
+                GROUP BY [Symbol], [EnglishCurrencyType]
             """
-            df_keys = pd.read_sql(query, engine)
-            logger.info(f"Loaded {len(df_keys)} existing keys from database")
-            return df_keys
+            df_latest = pd.read_sql(query, self.engine)
         except SQLAlchemyError as e:
-            logger.error(f"Database error loading keys: {e}")
-            raise
+            logger.warning(f"Could not load latest dates - fetching full history: {e}")
+            return {}
+        
+        latest = {
+            (symbol, ctype): str(date).translate(_DIGIT_TRANS)
+            for symbol, ctype, date in zip(
+                df_latest['Symbol'], df_latest['EnglishCurrencyType'], df_latest['LatestDate']
+            )
+            if date
+        }
+        logger.info(f"Loaded latest stored dates for {len(latest)} currencies")
+        return latest
     
-    def find_new_records(self, df_new: pd.DataFrame, df_existing_keys: pd.DataFrame) -> pd.DataFrame:
+    def _ensure_key_index(self, conn) -> None:
         """
-        Identify new records by comparing against existing database keys.
+        Create the covering key index used by the NOT EXISTS insert.
         
-        Args:
-            df_new: New records fetched from API
-            df_existing_keys: Existing keys from database
+        Leading with the equality columns and ending with Date also serves the
+        per-currency MAX(Date) watermark.
         
-        Returns:
-            Subset of df_new containing only new records
+        Args:
+            conn: Open SQLAlchemy connection
         """
-        if df_existing_keys.empty:
-            logger.info("No existing records in database - all records are new")
-            return df_new
-        
-        key_cols = ['Date', 'Symbol', 'EnglishCurrencyType']
-        
-        df_new_keys = df_new[key_cols].copy()
-        df_existing_keys = df_existing_keys[key_cols].copy()
-        
-        df_merged = df_new_keys.merge(
-            df_existing_keys,
-            on=key_cols,
-            how='left',
-            indicator=True
-        )
-        
-        new_mask = df_merged['_merge'] == 'left_only'
-        df_delta = df_new.loc[new_mask].copy()
-        
-        logger.info(f"Found {len(df_delta)} new records out of {len(df_new)} total")
-        return df_delta
+        index_name = f"IX_{self.table_name}_Key"
+        conn.execute(text(f"""
+            IF NOT EXISTS (
+                SELECT 1 FROM sys.indexes
+                WHERE name = '{index_name}' AND object_id = OBJECT_ID('{self.table_name}')
+            )
+                CREATE INDEX [{index_name}]
+                ON {self.table_name} ([EnglishAssetType], [Symbol], [EnglishCurrencyType], [Date])
+        """))
     
     def save_to_database(self, df: pd.DataFrame) -> bool:
         """
-        Save DataFrame to SQL Server database with proper schema.
+        Insert records that are not yet in the database, with proper schema.
+        
+        Rows are bulk-loaded into a session-local staging table and copied into
+        the target with a NOT EXISTS join, so deduplication runs in SQL Server
+        instead of pulling existing keys to the client.
         
         Args:
             df: DataFrame to save
@@ -531,33 +974,50 @@ class CurrencyETL:
             return True
         
         try:
-            logger.info(f"Saving {len(df)} rows to database table '{self.table_name}'...")
+            logger.info(f"Staging {len(df)} rows for database table '{self.table_name}'...")
             
-            engine = create_engine(self.connection_string, fast_executemany=True)
+            stage_table = f"#{self.table_name}_stage"
+            columns = ', '.join(f"[{col}]" for col in df.columns)
+            placeholders = ', '.join('?' for _ in df.columns)
+            key_match = ' AND '.join(f"t.[{col}] = s.[{col}]" for col in Config.KEY_COLUMNS)
             
-            df.to_sql(
-                self.table_name,
-                engine,
-                if_exists='append',
-                index=False,
-                chunksize=1000,
-                dtype={
-                    'Date': CHAR(10),
-                    'Name': NVARCHAR(100),
-                    'SellPrice': BigInteger(),
-                    'BuyPrice': BigInteger(),
-                    'ScrapeDate': CHAR(10),
-                    'Scrapetime': CHAR(8),
-                    'Symbol': CHAR(3),
-                    'PersianCurrencyType': NVARCHAR(50),
-                    'EnglishCurrencyType': NVARCHAR(50),
-                    'PersianAssetType': NVARCHAR(50),
-                    'EnglishAssetType': NVARCHAR(50),
-                    'ScrapeDateTime': DATETIME()
-                }
-            )
+            # Native Python values with None for missing (pyodbc cannot bind pd.NA)
+            rows = list(df.astype(object).where(df.notna(), None).itertuples(index=False, name=None))
             
-            logger.info(f"✓ Successfully inserted {len(df)} rows into {self.table_name}")
+            # Temp tables are connection-scoped, so stage and insert on one connection
+            with self.engine.begin() as conn:
+                if not inspect(conn).has_table(self.table_name):
+                    logger.info(f"Creating table: {self.table_name}")
+                    df.head(0).to_sql(self.table_name, conn, index=False, dtype=Config.COLUMN_TYPES)
+                self._ensure_key_index(conn)
+                
+                # Stage table mirrors the target's column types
+                conn.execute(text(f"SELECT TOP 0 {columns} INTO {stage_table} FROM {self.table_name}"))
+                
+                # Raw pyodbc executemany skips to_sql's per-batch type adaptation;
+                # fast_executemany sends each chunk as one bound parameter array
+                cursor = conn.connection.cursor()
+                cursor.fast_executemany = True
+                insert_sql = f"INSERT INTO {stage_table} ({columns}) VALUES ({placeholders})"
+                for start in range(0, len(rows), Config.INSERT_CHUNK_SIZE):
+                    cursor.executemany(insert_sql, rows[start:start + Config.INSERT_CHUNK_SIZE])
+                cursor.close()
+                
+                result = conn.execute(text(f"""
+                    INSERT INTO {self.table_name} ({columns})
+                    SELECT {columns}
+                    FROM {stage_table} s
+                    WHERE NOT EXISTS (
+                        SELECT 1 FROM {self.table_name} t
+                        WHERE {key_match}
+                    )
+                """))
+                conn.execute(text(f"DROP TABLE {stage_table}"))
+            
+            if result.rowcount == 0:
+                logger.info("✓ Database already up to date - no new records to insert")
+            else:
+                logger.info(f"✓ Successfully inserted {result.rowcount} rows into {self.table_name}")
             return True
             
         except SQLAlchemyError as e:
@@ -581,28 +1041,23 @@ class CurrencyETL:
         
         try:
             # Step 1: Fetch fresh data from API
-            logger.info("[1/4] Fetching fresh data from ICE.ir API...")
+            logger.info("[1/2] Fetching fresh data from ICE.ir API...")
             df_new = self.process_all_currency_data()
             
             if df_new.empty:
-                logger.warning("No data fetched from API - aborting")
-                return False
-            
-            # Step 2: Load existing keys from database
-            logger.info("[2/4] Loading existing keys from database...")
-            df_existing_keys = self.load_existing_keys()
-            
-            # Step 3: Detect new records
-            logger.info("[3/4] Detecting new records...")
-            df_delta = self.find_new_records(df_new, df_existing_keys)
-            
-            if df_delta.empty:
-                logger.info("✓ Database already up to date - no new records to insert")
+                if self.failed_endpoints:
+                    logger.warning("No data fetched from API - aborting")
+                    return False
+                logger.info("✓ No new records since last run - database already up to date")
                 return True
             
-            # Step 4: Save to database
-            logger.info(f"[4/4] Inserting {len(df_delta)} new records...")
-            success = self.save_to_database(df_delta)
+            # Step 2: Insert new records (deduplicated server-side)
+            logger.info(f"[2/2] Inserting new records out of {len(df_new)} fetched...")
+            success = self.save_to_database(df_new)
+            
+            # Only trust validators once their data is safely stored
+            if success:
+                self._save_validators()
             
             # Summary
             duration = datetime.now() - start_time
@@ -621,6 +1076,7 @@ class CurrencyETL:
             return False
         finally:
             self.session.close()
+            self.engine.dispose()
 
 
 # Legacy functions for backward compatibility
@@ -16,14 +16,34 @@ Usage:
 """
 
 import os
+import re
+import sys
 import logging
-from typing import Optional, Dict, Any
+import functools
+from typing import Optional, Dict, Any, Mapping
 from urllib.parse import quote_plus
 from pathlib import Path
+from types import MappingProxyType
 from dataclasses import dataclass, field
 
 logger = logging.getLogger(__name__)
 
+# Slotted dataclasses (no per-instance __dict__) where supported (3.10+)
+_DATACLASS_OPTIONS: Dict[str, Any] = {'slots': True} if sys.version_info >= (3, 10) else {}
+
+# .env files already applied in this process (re-imports become no-ops)
+_LOADED_ENV_FILES = set()
+
+# KEY=VALUE line; a value wrapped in matching quotes has them removed
+_ENV_LINE_RE = re.compile(
+    r'^[ \t]*([^#\s=][^=\n]*?)[ \t]*=[ \t]*'
+    r'(?:"(.*)"|\'(.*)\'|(.*?))[ \t]*$',
+    re.MULTILINE
+)
+
+# Template fragments that mark a value copied unchanged from .env.example
+_PLACEHOLDER_RE = re.compile(r'your_|example|placeholder|change_?me|path_to', re.IGNORECASE)
+
 
 def load_env_file(env_path: str = '.env') -> None:
     """
@@ -35,41 +55,36 @@ def load_env_file(env_path: str = '.env') -> None:
     Args:
         env_path: Path to .env file (default: '.env')
     """
+    resolved_path = os.path.abspath(env_path)
+    if resolved_path in _LOADED_ENV_FILES:
+        return
+    
     if not os.path.exists(env_path):
         logger.debug(f"No {env_path} file found - using system environment variables")
         return
     
     try:
-        with open(env_path, 'r', encoding='utf-8') as f:
-            for line_num, line in enumerate(f, 1):
-                line = line.strip()
-                
-                # Skip comments and empty lines
-                if not line or line.startswith('#'):
-                    continue
-                
-                # Parse KEY=VALUE
-                if '=' not in line:
-                    continue
-                    
-                key, value = line.split('=', 1)
-                key = key.strip()
-                value = value.strip()
-                
-                # Remove quotes if present
-                if (value.startswith('"') and value.endswith('"')) or \
-                   (value.startswith("'") and value.endswith("'")):
-                    value = value[1:-1]
-                
-                # Only set if not already in environment (env vars have priority)
-                if key not in os.environ:
-                    os.environ[key] = value
+        text = Path(env_path).read_text(encoding='utf-8')
+        
+        # Comments, blank lines and lines without '=' never match;
+        # env vars already set have priority over the file
+        for match in _ENV_LINE_RE.finditer(text):
+            key, double_quoted, single_quoted, bare = match.groups()
+            value = next(v for v in (double_quoted, single_quoted, bare) if v is not None)
+            os.environ.setdefault(key, value)
         
+        _LOADED_ENV_FILES.add(resolved_path)
         logger.info(f"Loaded environment variables from {env_path}")
     except Exception as e:
         logger.warning(f"Failed to load {env_path}: {e}")
 
 
+def _as_int(env: Mapping[str, str], key: str, default: int) -> int:
+    """Read an integer setting from an environment mapping."""
+    value = env.get(key)
+    return default if value is None else int(value)
+
+
 def validate_no_placeholders(value: str, var_name: str) -> None:
     """
     Validate that environment variable doesn't contain placeholder values.
@@ -81,9 +96,7 @@ def validate_no_placeholders(value: str, var_name: str) -> None:
     Raises:
         ValueError: If placeholder detected
     """
-    placeholders = ['your_', 'example', 'placeholder', 'changeme', 'change_me', 'path_to']
-    
-    if any(ph in value.lower() for ph in placeholders):
+    if _PLACEHOLDER_RE.search(value):
         raise ValueError(
             f"⚠️  Environment variable {var_name} contains placeholder value: '{value}'\n"
             f"Please update your .env file with actual values.\n"
@@ -91,7 +104,7 @@ def validate_no_placeholders(value: str, var_name: str) -> None:
         )
 
 
-@dataclass
+@dataclass(**_DATACLASS_OPTIONS)
 class DatabaseConfig:
     """Database connection configuration."""
     server: str
@@ -103,6 +116,7 @@ class DatabaseConfig:
     trusted_connection: bool = False
     table_name: str = 'scraped'
     connection_timeout: int = 30
+    _connection_string: str = field(default='', init=False, repr=False, compare=False)
     
     def __post_init__(self):
         """Validate configuration after initialization."""
@@ -114,8 +128,20 @@ class DatabaseConfig:
         # Validate no placeholders
         validate_no_placeholders(self.server, 'server')
         validate_no_placeholders(self.database, 'database')
+        
+        # Quote credentials once instead of on every engine creation
+        self._connection_string = self._build_connection_string()
     
     def get_connection_string(self) -> str:
+        """
+        Get SQLAlchemy connection string.
+        
+        Returns:
+            Connection string compatible with SQLAlchemy 2.0
+        """
+        return self._connection_string
+    
+    def _build_connection_string(self) -> str:
         """
         Build SQLAlchemy connection string.
         
@@ -168,8 +194,10 @@ class DatabaseConfig:
             {PREFIX}_TABLE_NAME: Target table name (default: 'scraped')
             {PREFIX}_CONNECTION_TIMEOUT: Connection timeout seconds (default: 30)
         """
-        server = os.getenv(f'{prefix}_SERVER')
-        database = os.getenv(f'{prefix}_NAME')
+        env = os.environ
+        p = prefix + '_'
+        server = env.get(p + 'SERVER')
+        database = env.get(p + 'NAME')
         
         if not server or not database:
             raise ValueError(
@@ -180,36 +208,38 @@ class DatabaseConfig:
             )
         
         # Check if trusted connection is enabled
-        trusted_conn_str = os.getenv(f'{prefix}_TRUSTED_CONNECTION', 'no').lower()
+        trusted_conn_str = env.get(p + 'TRUSTED_CONNECTION', 'no').lower()
         trusted_connection = trusted_conn_str in ('yes', 'true', '1')
         
         # Get credentials (only required if not using trusted connection)
-        user = os.getenv(f'{prefix}_USER')
-        password = os.getenv(f'{prefix}_PASSWORD')
+        user = env.get(p + 'USER')
+        password = env.get(p + 'PASSWORD')
         
         return cls(
             server=server,
             database=database,
-            driver=os.getenv(f'{prefix}_DRIVER', 'ODBC Driver 17 for SQL Server'),
-            port=int(os.getenv(f'{prefix}_PORT', '1433')),
+            driver=env.get(p + 'DRIVER', 'ODBC Driver 17 for SQL Server'),
+            port=_as_int(env, p + 'PORT', 1433),
             user=user,
             password=password,
             trusted_connection=trusted_connection,
-            table_name=os.getenv(f'{prefix}_TABLE_NAME', 'scraped'),
-            connection_timeout=int(os.getenv(f'{prefix}_CONNECTION_TIMEOUT', '30'))
+            table_name=env.get(p + 'TABLE_NAME', 'scraped'),
+            connection_timeout=_as_int(env, p + 'CONNECTION_TIMEOUT', 30)
         )
 
 
-@dataclass
+@dataclass(**_DATACLASS_OPTIONS)
 class ScraperConfig:
     """Web scraper configuration."""
     firefox_binary_path: str
     geckodriver_path: str
     url: str = 'https://ice.ir/'
     page_load_timeout: int = 30
-    implicit_wait: int = 10
+    implicit_wait: int = 0
     explicit_wait: int = 15
     headless: bool = True
+    require_js: bool = True
+    profile_dir: Optional[str] = None
     
     def __post_init__(self):
         """Validate paths after initialization."""
@@ -236,12 +266,17 @@ class ScraperConfig:
             GECKODRIVER_PATH: Path to geckodriver executable
             ICE_URL: Target URL (default: https://ice.ir/)
             PAGE_LOAD_TIMEOUT: Page load timeout seconds (default: 30)
-            IMPLICIT_WAIT: Implicit wait seconds (default: 10)
+            IMPLICIT_WAIT: Implicit wait seconds; 0 relies on explicit waits only (default: 0)
             EXPLICIT_WAIT: Explicit wait seconds (default: 15)
             HEADLESS: Run in headless mode (default: true)
+            SCRAPER_REQUIRE_JS: Always render with Firefox; set to no/false/0 to
+                try a plain HTTP fetch first (default: true)
+            FIREFOX_PROFILE_DIR: Persistent Firefox profile whose disk cache is
+                kept between runs (default: fresh temporary profile)
         """
-        firefox_path = os.getenv('FIREFOX_BINARY_PATH')
-        geckodriver_path = os.getenv('GECKODRIVER_PATH')
+        env = os.environ
+        firefox_path = env.get('FIREFOX_BINARY_PATH')
+        geckodriver_path = env.get('GECKODRIVER_PATH')
         
         if not firefox_path or not geckodriver_path:
             raise ValueError(
@@ -253,20 +288,23 @@ class ScraperConfig:
         validate_no_placeholders(firefox_path, 'FIREFOX_BINARY_PATH')
         validate_no_placeholders(geckodriver_path, 'GECKODRIVER_PATH')
         
-        headless_str = os.getenv('HEADLESS', 'true').lower()
+        headless_str = env.get('HEADLESS', 'true').lower()
+        require_js_str = env.get('SCRAPER_REQUIRE_JS', 'true').lower()
         
         return cls(
             firefox_binary_path=firefox_path,
             geckodriver_path=geckodriver_path,
-            url=os.getenv('ICE_URL', 'https://ice.ir/'),
-            page_load_timeout=int(os.getenv('PAGE_LOAD_TIMEOUT', '30')),
-            implicit_wait=int(os.getenv('IMPLICIT_WAIT', '10')),
-            explicit_wait=int(os.getenv('EXPLICIT_WAIT', '15')),
-            headless=headless_str in ('yes', 'true', '1')
+            url=env.get('ICE_URL', 'https://ice.ir/'),
+            page_load_timeout=_as_int(env, 'PAGE_LOAD_TIMEOUT', 30),
+            implicit_wait=_as_int(env, 'IMPLICIT_WAIT', 0),
+            explicit_wait=_as_int(env, 'EXPLICIT_WAIT', 15),
+            headless=headless_str in ('yes', 'true', '1'),
+            require_js=require_js_str not in ('no', 'false', '0'),
+            profile_dir=env.get('FIREFOX_PROFILE_DIR') or None
         )
 
 
-@dataclass
+@dataclass(**_DATACLASS_OPTIONS)
 class LogConfig:
     """Logging configuration."""
     level: int = logging.INFO
@@ -286,7 +324,8 @@ class LogConfig:
             LOG_LEVEL: Logging level (DEBUG/INFO/WARNING/ERROR/CRITICAL)
             LOG_DIR: Log directory path (default: 'logs')
         """
-        level_str = os.getenv('LOG_LEVEL', 'INFO').upper()
+        env = os.environ
+        level_str = env.get('LOG_LEVEL', 'INFO').upper()
         levels = {
             'DEBUG': logging.DEBUG,
             'INFO': logging.INFO,
@@ -297,11 +336,11 @@ class LogConfig:
         
         return cls(
             level=levels.get(level_str, logging.INFO),
-            directory=os.getenv('LOG_DIR', 'logs')
+            directory=env.get('LOG_DIR', 'logs')
         )
 
 
-@dataclass
+@dataclass(**_DATACLASS_OPTIONS)
 class RetryConfig:
     """Retry logic configuration."""
     max_attempts: int = 3
@@ -322,14 +361,15 @@ class RetryConfig:
             RETRY_WAIT_MULTIPLIER: Exponential backoff multiplier (default: 1)
             RETRY_WAIT_MAX: Maximum wait time seconds (default: 10)
         """
+        env = os.environ
         return cls(
-            max_attempts=int(os.getenv('RETRY_MAX_ATTEMPTS', '3')),
-            wait_exponential_multiplier=int(os.getenv('RETRY_WAIT_MULTIPLIER', '1')),
-            wait_exponential_max=int(os.getenv('RETRY_WAIT_MAX', '10'))
+            max_attempts=_as_int(env, 'RETRY_MAX_ATTEMPTS', 3),
+            wait_exponential_multiplier=_as_int(env, 'RETRY_WAIT_MULTIPLIER', 1),
+            wait_exponential_max=_as_int(env, 'RETRY_WAIT_MAX', 10)
         )
 
 
-@dataclass
+@dataclass(**_DATACLASS_OPTIONS)
 class Config:
     """Main application configuration."""
     database: DatabaseConfig
@@ -406,6 +446,8 @@ class Config:
         print(f"  Firefox: {self.scraper.firefox_binary_path}")
         print(f"  Geckodriver: {self.scraper.geckodriver_path}")
         print(f"  Headless: {self.scraper.headless}")
+        print(f"  Require JavaScript: {self.scraper.require_js}")
+        print(f"  Profile: {self.scraper.profile_dir or 'temporary'}")
         print(f"  Page Load Timeout: {self.scraper.page_load_timeout}s")
         
         # Logging config
@@ -422,6 +464,68 @@ class Config:
         print("\n" + "="*60 + "\n")
 
 
+@functools.lru_cache(maxsize=8)
+def get_connection_string(prefix: str = 'DB') -> str:
+    """
+    Get the SQLAlchemy connection string for a database prefix.
+    
+    Results are cached per prefix, so repeated callers don't rebuild
+    and revalidate the configuration.
+    
+    Args:
+        prefix: Environment variable prefix (e.g., 'DB' or 'ICE_DB')
+    
+    Returns:
+        {PREFIX}_CONNECTION_STRING if set, otherwise a connection string
+        built from the individual {PREFIX}_* variables
+    """
+    conn_str = os.environ.get(f'{prefix}_CONNECTION_STRING')
+    if conn_str:
+        return conn_str
+    return DatabaseConfig.from_env(prefix).get_connection_string()
+
+
+@functools.lru_cache(maxsize=8)
+def get_table_name(prefix: str = 'DB', default: str = 'scraped') -> str:
+    """
+    Get the target table name for a database prefix.
+    
+    Args:
+        prefix: Environment variable prefix (e.g., 'DB' or 'ICE_DB')
+        default: Table name used when {PREFIX}_TABLE_NAME is not set
+    
+    Returns:
+        Table name
+    """
+    return os.environ.get(f'{prefix}_TABLE_NAME', default)
+
+
+@functools.lru_cache(maxsize=1)
+def get_api_config() -> Mapping[str, int]:
+    """
+    Get API client settings from environment variables.
+    
+    The result is cached and shared by every caller, so it is returned
+    as a read-only mapping.
+    
+    Returns:
+        Read-only mapping with page_size, timeout, max_retries and max_workers
+    
+    Environment Variables:
+        API_PAGE_SIZE: Records per page (default: 1000)
+        API_TIMEOUT: Request timeout seconds (default: 30)
+        API_MAX_RETRIES: Retry attempts per request (default: 3)
+        API_MAX_WORKERS: Endpoints fetched concurrently (default: 8)
+    """
+    env = os.environ
+    return MappingProxyType({
+        'page_size': _as_int(env, 'API_PAGE_SIZE', 1000),
+        'timeout': _as_int(env, 'API_TIMEOUT', 30),
+        'max_retries': _as_int(env, 'API_MAX_RETRIES', 3),
+        'max_workers': _as_int(env, 'API_MAX_WORKERS', 8)
+    })
+
+
 # Auto-load .env file when module is imported
 load_env_file()
 
@@ -22,13 +22,13 @@ Last Updated: Feb 08 2026
 import logging
 import sys
 import re
-import time
 from pathlib import Path
-from typing import Optional, List, Dict, Tuple
+from typing import Optional, List, Dict, Tuple, Union
 from datetime import datetime
-from contextlib import contextmanager
+from contextlib import contextmanager, ExitStack
 
 import pandas as pd
+import requests
 from selenium import webdriver
 from selenium.webdriver.firefox.service import Service
 from selenium.webdriver.firefox.options import Options
@@ -37,13 +37,12 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, WebDriverException
 from bs4 import BeautifulSoup
+import soupsieve
 
 # SQLAlchemy 2.0 imports
-from sqlalchemy import create_engine, Table, Column, MetaData, inspect
-from sqlalchemy import CHAR, NVARCHAR, BigInteger, Integer
-from sqlalchemy.orm import Session
+from sqlalchemy import Table, Column, MetaData, inspect, text
+from sqlalchemy import CHAR, NVARCHAR, BigInteger
 from sqlalchemy.exc import SQLAlchemyError
-from sqlalchemy.pool import NullPool
 
 # Retry logic
 try:
@@ -59,8 +58,33 @@ except ImportError:
     TENACITY_AVAILABLE = False
     logging.warning("tenacity not installed - retry logic disabled")
 
+# Faster C-based HTML parser for BeautifulSoup
+try:
+    import lxml  # noqa: F401
+    HTML_PARSER = 'lxml'
+except ImportError:
+    HTML_PARSER = 'html.parser'
+
 from config import Config
 
+# Persian and Arabic-Indic digits map to ASCII
+_PERSIAN_DIGIT_TRANS = str.maketrans('۰۱۲۳۴۵۶۷۸۹٠١٢٣٤٥٦٧٨٩', '01234567890123456789')
+
+# Characters removed from numbers after digit translation
+_NON_NUMERIC_RE = re.compile(r'[^\d.]')
+
+# Same filter for scalar cleaning: every byte except ASCII 0-9 and '.'
+_NON_NUMERIC_BYTES = bytes(b for b in range(256) if not (0x30 <= b <= 0x39 or b == 0x2E))
+
+# Columns identifying one scraped record
+KEY_COLUMNS = ['Date', 'Name']
+
+# Browser identity shared by the Firefox and plain-HTTP fetch paths
+_USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+)
+
 
 class ICEScraper:
     """
@@ -100,6 +124,14 @@ class ICEScraper:
         self.metadata = MetaData()
         self._define_table_schema()
         
+        # Engine is created on first save and reused by later runs
+        self._engine = None
+        self._table_checked = False
+        
+        # Long-lived WebDriver, only held while used as a context manager
+        self._driver = None
+        self._driver_stack = ExitStack()
+        
         self.logger.info("ICEScraper initialized successfully")
     
     def _setup_logging(self) -> None:
@@ -184,17 +216,27 @@ class ICEScraper:
             options.add_argument("--disable-extensions")
             options.add_argument("--disable-plugins")
             
+            # Reuse a persistent profile so cached page assets survive between runs
+            if self.config.scraper.profile_dir:
+                Path(self.config.scraper.profile_dir).mkdir(parents=True, exist_ok=True)
+                options.add_argument("-profile")
+                options.add_argument(self.config.scraper.profile_dir)
+                options.set_preference("browser.cache.disk.enable", True)
+            
             # Set realistic user agent
-            options.set_preference(
-                "general.useragent.override",
-                "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
-                "(KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
-            )
+            options.set_preference("general.useragent.override", _USER_AGENT)
             
             # Optimize loading performance
             options.set_preference("dom.ipc.plugins.enabled.libflashplayer.so", False)
             options.set_preference("media.volume_scale", "0.0")
             
+            # Skip resources the price list doesn't need (stylesheets stay
+            # enabled since visibility-dependent content relies on them)
+            options.set_preference("permissions.default.image", 2)
+            options.set_preference("media.autoplay.default", 5)
+            options.set_preference("gfx.downloadable_fonts.enabled", False)
+            options.set_preference("dom.webnotifications.enabled", False)
+            
             # Create service and driver
             service = Service(self.config.scraper.geckodriver_path)
             driver = webdriver.Firefox(service=service, options=options)
@@ -238,6 +280,21 @@ class ICEScraper:
             reraise=True
         )
     
+    def _content_ready(self, driver: webdriver.Firefox) -> bool:
+        """
+        Check whether the dynamic price list has finished rendering.
+        
+        Args:
+            driver: WebDriver instance
+            
+        Returns:
+            True once dates, prices and names are all present
+        """
+        return all(
+            driver.find_elements(By.CSS_SELECTOR, self.selectors[key])
+            for key in ('dates', 'prices', 'names')
+        )
+    
     def _scrape_page_content(self, driver: webdriver.Firefox) -> str:
         """
         Load the target page and extract HTML content with retry logic.
@@ -265,8 +322,9 @@ class ICEScraper:
                 EC.presence_of_element_located((By.CSS_SELECTOR, self.selectors['dates']))
             )
             
-            # Additional wait for dynamic content
-            time.sleep(3)
+            # Proceed as soon as names and prices have rendered too,
+            # rather than sleeping a fixed interval for dynamic content
+            wait.until(self._content_ready)
             
             return driver.page_source
         
@@ -279,33 +337,56 @@ class ICEScraper:
             self.logger.error(f"Failed to load page after retries: {str(e)}")
             raise
     
-    def _extract_data_from_html(self, html_content: str) -> Dict[str, List[str]]:
+    def _fetch_static(self) -> bytes:
+        """
+        Fetch the target page over plain HTTP, without starting a browser.
+        
+        Returns:
+            Raw page bytes as served (no JavaScript executed); BeautifulSoup
+            detects the encoding from the page's meta charset
+            
+        Raises:
+            requests.RequestException: If the request fails
+        """
+        self.logger.info(f"Fetching page without browser: {self.config.scraper.url}")
+        response = requests.get(
+            self.config.scraper.url,
+            headers={'User-Agent': _USER_AGENT},
+            timeout=self.config.scraper.page_load_timeout
+        )
+        response.raise_for_status()
+        # requests assumes ISO-8859-1 for text/html without a charset header,
+        # which would garble the Persian text; let the parser decode instead
+        return response.content
+    
+    def _extract_data_from_html(self, html_content: Union[str, bytes]) -> Dict[str, List[str]]:
         """
         Parse HTML content and extract commodity data.
         
         Args:
-            html_content: HTML content to parse
+            html_content: HTML content to parse (text, or undecoded page bytes)
             
         Returns:
             Dictionary containing extracted data lists
         """
         try:
             self.logger.info("Parsing HTML content...")
-            soup = BeautifulSoup(html_content, "html.parser")
-            
-            # Extract data using CSS selectors
-            dates = [
-                date.get_text(strip=True).strip() 
-                for date in soup.select(self.selectors['dates'])
-            ]
-            prices = [
-                price.get_text(strip=True).strip() 
-                for price in soup.select(self.selectors['prices'])
-            ]
-            names = [
-                name.get_text(strip=True).strip() 
-                for name in soup.select(self.selectors['names'])
+            soup = BeautifulSoup(html_content, HTML_PARSER)
+            
+            # One traversal for all three selectors; matches arrive in
+            # document order and are routed to the list whose selector matches
+            extracted = {key: [] for key in ('dates', 'prices', 'names')}
+            matchers = [
+                (soupsieve.compile(self.selectors[key]), values)
+                for key, values in extracted.items()
             ]
+            combined_selector = ', '.join(self.selectors[key] for key in extracted)
+            for element in soup.select(combined_selector):
+                for matcher, values in matchers:
+                    if matcher.match(element):
+                        values.append(element.get_text(strip=True))
+                        break
+            dates, prices, names = extracted['dates'], extracted['prices'], extracted['names']
             
             # Log extraction results
             self.logger.info(f"Extracted {len(dates)} dates, {len(prices)} prices, {len(names)} names")
@@ -335,26 +416,26 @@ class ICEScraper:
         """
         Clean and convert Persian numbers to float.
         
+        Scalar helper for callers outside the pipeline; _process_scraped_data
+        uses the vectorized _clean_numeric_text instead. Persian and Arabic-Indic
+        digits are translated before the ASCII encode, and the decimal point
+        is kept (unlike CurrencyETL.clean_persian_number, which keeps digits
+        only and returns a string).
+        
         Args:
             text: Text containing Persian numbers and formatting
             
         Returns:
             Converted number or None if conversion fails
         """
-        if not text or pd.isna(text):
+        # Inline None/NaN checks (NaN != NaN) avoid pd.isna dispatch per cell
+        if text is None or text is pd.NA or text != text or not text:
             return None
         
         try:
-            # Persian to English digit mapping
-            persian_digits = '۰۱۲۳۴۵۶۷۸۹'
-            english_digits = '0123456789'
-            trans_table = str.maketrans(persian_digits, english_digits)
-            
-            # Convert to string and replace Persian digits
-            text = str(text).translate(trans_table)
-            
-            # Remove commas and other formatting characters except dots
-            cleaned = re.sub(r'[^\d.]', '', text)
+            # Translate digits first so the ASCII encode cannot drop them
+            ascii_text = str(text).translate(_PERSIAN_DIGIT_TRANS).encode('ascii', 'ignore')
+            cleaned = ascii_text.translate(None, _NON_NUMERIC_BYTES).decode('ascii')
             
             return float(cleaned) if cleaned else None
                 
@@ -384,6 +465,23 @@ class ICEScraper:
             logging.warning(f"Error formatting date '{text}': {str(e)}")
             return str(text)
     
+    @staticmethod
+    def _clean_numeric_text(values: pd.Series) -> pd.Series:
+        """
+        Translate Persian digits and strip formatting for a whole column.
+        
+        Args:
+            values: Column of scraped text
+            
+        Returns:
+            Column of digit/dot strings ('' where nothing numeric remains)
+        """
+        return (
+            values.fillna('').astype(str)
+            .str.translate(_PERSIAN_DIGIT_TRANS)
+            .str.replace(_NON_NUMERIC_RE, '', regex=True)
+        )
+    
     def _process_scraped_data(self, raw_data: Dict[str, List[str]]) -> pd.DataFrame:
         """
         Process raw scraped data into a clean DataFrame.
@@ -397,33 +495,41 @@ class ICEScraper:
         try:
             self.logger.info("Processing scraped data...")
             
-            # Create DataFrame
+            # Clean and convert columns (vectorized equivalents of
+            # clean_persian_number and correct_date_format)
+            self.logger.info("Cleaning Date column...")
+            dates = self._clean_numeric_text(pd.Series(raw_data['dates'], dtype=object))
+            is_compact = dates.str.fullmatch(r'\d{8}')
+            invalid_dates = int((~is_compact & (dates != '')).sum())
+            if invalid_dates > 0:
+                self.logger.warning(f"Found {invalid_dates} dates not in YYYYMMDD format")
+            dates = (
+                (dates.str[:4] + '/' + dates.str[4:6] + '/' + dates.str[6:8])
+                .where(is_compact, dates)
+                .replace('', None)
+            )
+            
+            self.logger.info("Cleaning Price column...")
+            prices = self._clean_numeric_text(pd.Series(raw_data['prices'], dtype=object))
+            prices = pd.to_numeric(prices, errors='coerce').fillna(0).astype('int64')
+            
+            # Build the frame once from the cleaned arrays; plain arrays (not
+            # Series) keep the length check instead of index alignment
+            scrape_datetime = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
             df = pd.DataFrame({
-                'Date': raw_data['dates'],
+                'Date': dates.to_numpy(),
                 'Name': raw_data['names'],
-                'Price': raw_data['prices']
+                'Price': prices.to_numpy(),
+                'ScrapeDate': scrape_datetime[:10],
+                'ScrapeTime': scrape_datetime[11:]
             })
             
             self.logger.info(f"Created DataFrame with {len(df)} rows")
             
-            # Add timestamp columns
-            current_time = datetime.now()
-            df['ScrapeDate'] = current_time.strftime('%Y-%m-%d')
-            df['ScrapeTime'] = current_time.strftime('%H:%M:%S')
-            
-            # Clean and convert columns
-            self.logger.info("Cleaning Date column...")
-            df['Date'] = df['Date'].apply(self.clean_persian_number)
-            df['Date'] = df['Date'].apply(self.correct_date_format)
-            
-            self.logger.info("Cleaning Price column...")
-            df['Price'] = df['Price'].apply(self.clean_persian_number)
-            df['Price'] = pd.to_numeric(df['Price'], errors='coerce').fillna(0).astype('int64')
-            
             # Handle duplicates
             initial_rows = len(df)
             self.logger.info("Checking for duplicate records...")
-            df = df.drop_duplicates(subset=['Date', 'Name'], keep='first')
+            df = df.drop_duplicates(subset=KEY_COLUMNS, keep='first')
             
             duplicates_removed = initial_rows - len(df)
             if duplicates_removed > 0:
@@ -447,9 +553,90 @@ class ICEScraper:
             self.logger.error(f"Error processing scraped data: {str(e)}")
             raise
     
+    def _get_engine(self):
+        """
+        Get the scraper's SQLAlchemy engine, creating it on first use.
+        
+        fast_executemany sends each insert batch to pyodbc as one parameter
+        array instead of row by row.
+        
+        Returns:
+            SQLAlchemy Engine instance
+        """
+        if self._engine is None:
+            self._engine = self.config.create_engine(fast_executemany=True)
+        return self._engine
+    
+    def __enter__(self) -> 'ICEScraper':
+        """
+        Start a WebDriver shared by every scrape_and_store call in the block.
+        
+        Returns:
+            This scraper instance
+        """
+        self._driver = self._driver_stack.enter_context(self._get_webdriver())
+        return self
+    
+    def _shared_driver(self) -> Optional[webdriver.Firefox]:
+        """
+        Get the long-lived WebDriver, restarting it if its session has died.
+        
+        Returns:
+            Live WebDriver instance, or None if the restart failed (callers
+            then fall back to a per-call WebDriver)
+        """
+        try:
+            self._driver.current_window_handle
+        except WebDriverException as e:
+            self.logger.warning(f"Shared WebDriver session lost, restarting: {str(e)}")
+            # Forget the dead driver first so a failed restart leaves no stale handle
+            self._driver = None
+            self._driver_stack.close()
+            try:
+                self._driver = self._driver_stack.enter_context(self._get_webdriver())
+            except WebDriverException as restart_error:
+                self.logger.warning(f"Shared WebDriver restart failed: {str(restart_error)}")
+        return self._driver
+    
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        """Close the shared WebDriver and database engine."""
+        self.close()
+    
+    def close(self) -> None:
+        """Close the shared WebDriver, if any, and dispose of the database engine."""
+        self._driver = None
+        self._driver_stack.close()
+        
+        if self._engine is not None:
+            self._engine.dispose()
+            self._engine = None
+            self.logger.debug("Database engine disposed")
+    
+    def _ensure_key_index(self, conn) -> None:
+        """
+        Create the key index used by the NOT EXISTS insert.
+        
+        Args:
+            conn: Open SQLAlchemy connection
+        """
+        table_name = self.config.database.table_name
+        index_name = f"IX_{table_name}_Key"
+        key_columns = ', '.join(f"[{col}]" for col in KEY_COLUMNS)
+        conn.execute(text(f"""
+            IF NOT EXISTS (
+                SELECT 1 FROM sys.indexes
+                WHERE name = '{index_name}' AND object_id = OBJECT_ID('{table_name}')
+            )
+                CREATE INDEX [{index_name}] ON {table_name} ({key_columns})
+        """))
+    
     def _save_to_database(self, df: pd.DataFrame) -> bool:
         """
-        Save processed data to SQL Server using SQLAlchemy 2.0 patterns.
+        Save records that are not yet in the database.
+        
+        Rows are bulk-loaded into a session-local staging table and copied into
+        the target with a NOT EXISTS join on (Date, Name), so rows already
+        stored by an earlier run are skipped by SQL Server.
         
         Args:
             df: Processed data to save
@@ -457,34 +644,64 @@ class ICEScraper:
         Returns:
             True if successful, False otherwise
         """
+        if df.empty:
+            self.logger.info("No data to save")
+            return True
+        
         try:
-            self.logger.info(
-                f"Saving {len(df)} rows to database table '{self.config.database.table_name}'..."
-            )
-            
-            # Create engine with configuration
-            engine = self.config.create_engine()
-            
-            # Create table if it doesn't exist
-            inspector = inspect(engine)
-            if not inspector.has_table(self.config.database.table_name):
-                self.logger.info(f"Creating table: {self.config.database.table_name}")
-                self.metadata.create_all(engine)
-            
-            # Save to database using pandas (compatible with SQLAlchemy 2.0)
-            df.to_sql(
-                name=self.config.database.table_name,
-                con=engine,
-                if_exists='append',
-                index=False,
-                method='multi',  # Batch insert for better performance
-                chunksize=1000
-            )
-            
-            # Cleanup
-            engine.dispose()
-            
-            self.logger.info("Data saved to database successfully")
+            table_name = self.config.database.table_name
+            self.logger.info(f"Staging {len(df)} rows for database table '{table_name}'...")
+            
+            engine = self._get_engine()
+            
+            stage_table = f"#{table_name}_stage"
+            columns = ', '.join(f"[{col}]" for col in df.columns)
+            placeholders = ', '.join('?' for _ in df.columns)
+            key_match = ' AND '.join(f"t.[{col}] = s.[{col}]" for col in KEY_COLUMNS)
+            
+            # Native Python values with None for missing (pyodbc cannot bind NaN)
+            rows = list(df.astype(object).where(df.notna(), None).itertuples(index=False, name=None))
+            
+            # Temp tables are connection-scoped, so stage and insert on one connection
+            with engine.begin() as conn:
+                # Create table if it doesn't exist (checked once per scraper)
+                if not self._table_checked:
+                    if not inspect(conn).has_table(table_name):
+                        self.logger.info(f"Creating table: {table_name}")
+                        self.metadata.create_all(conn)
+                    self._ensure_key_index(conn)
+                
+                # Stage table mirrors the target's column types
+                conn.execute(text(f"SELECT TOP 0 {columns} INTO {stage_table} FROM {table_name}"))
+                
+                # Raw pyodbc executemany skips SQLAlchemy's statement compilation
+                # and per-row dict binding; fast_executemany sends one parameter array
+                cursor = conn.connection.cursor()
+                cursor.fast_executemany = True
+                cursor.executemany(
+                    f"INSERT INTO {stage_table} ({columns}) VALUES ({placeholders})", rows
+                )
+                cursor.close()
+                
+                # Rows already stored by an earlier run are skipped by the server
+                result = conn.execute(text(f"""
+                    INSERT INTO {table_name} ({columns})
+                    SELECT {columns}
+                    FROM {stage_table} s
+                    WHERE NOT EXISTS (
+                        SELECT 1 FROM {table_name} t
+                        WHERE {key_match}
+                    )
+                """))
+                conn.execute(text(f"DROP TABLE {stage_table}"))
+            
+            # Only once committed: a rollback also undoes the CREATE TABLE/INDEX
+            self._table_checked = True
+            
+            if result.rowcount == 0:
+                self.logger.info("Database already up to date - no new records to insert")
+            else:
+                self.logger.info(f"Inserted {result.rowcount} new rows into {table_name}")
             return True
             
         except SQLAlchemyError as e:
@@ -508,13 +725,32 @@ class ICEScraper:
         self.logger.info("Starting ICE.ir scraping workflow...")
         
         try:
-            # Use context manager for WebDriver
-            with self._get_webdriver() as driver:
-                # Scrape page content
-                html_content = self._scrape_page_content(driver)
-                
-                # Extract raw data
+            raw_data = None
+            
+            # Try the plain HTTP path first when the page may not need JavaScript
+            if not self.config.scraper.require_js:
+                try:
+                    raw_data = self._extract_data_from_html(self._fetch_static())
+                except Exception as e:
+                    self.logger.warning(f"Static fetch unusable, falling back to Firefox: {str(e)}")
+            
+            shared_driver = None
+            if raw_data is None and self._driver is not None:
+                shared_driver = self._shared_driver()
+            
+            if shared_driver is not None:
+                # Reuse the long-lived driver, without the previous run's state
+                shared_driver.delete_all_cookies()
+                html_content = self._scrape_page_content(shared_driver)
                 raw_data = self._extract_data_from_html(html_content)
+            elif raw_data is None:
+                # Use context manager for WebDriver
+                with self._get_webdriver() as driver:
+                    # Scrape page content
+                    html_content = self._scrape_page_content(driver)
+                    
+                    # Extract raw data
+                    raw_data = self._extract_data_from_html(html_content)
             
             # Process data
             processed_df = self._process_scraped_data(raw_data)
@@ -553,7 +789,10 @@ def main():
         
         # Initialize and run scraper
         scraper = ICEScraper(config)
-        success, df = scraper.scrape_and_store()
+        try:
+            success, df = scraper.scrape_and_store()
+        finally:
+            scraper.close()
         
         if success:
             print(f"✅ Scraping completed successfully! Saved {len(df)} records.")